@@ -1,12 +1,19 @@
 use rayon::prelude::*;
+use sha2::{Digest, Sha256};
 use std::{
     collections::HashSet,
     fs::{self, File},
-    io::{Cursor, Read, Write},
+    io::{self, Write},
     path::{Path, PathBuf},
 };
 use zip::write::FileOptions;
 
+/// Directories never containing files of interest to `output_reruns`: skip them entirely
+const SKIPPED_DIRS: &[&str] = &[".git", "node_modules", "target"];
+
+/// Directories inside a package that `kit` generates or that do not affect its build
+const CACHE_SKIPPED_DIRS: &[&str] = &["node_modules", "target", "wit"];
+
 fn get_features() -> String {
     let mut features = "".to_string();
     for (key, _) in std::env::vars() {
@@ -24,8 +31,12 @@ fn get_features() -> String {
 }
 
 fn output_reruns(dir: &Path, rerun_files: &HashSet<String>) {
-    if rerun_files.contains(dir.to_str().unwrap()) {
-        // Output for all files in the directory if the directory itself is specified in rerun_files
+    // Directories are specified in rerun_files by name with a trailing slash, e.g. `src/`
+    let dir_name = dir.file_name().and_then(|n| n.to_str());
+    if dir_name.is_some_and(|name| rerun_files.contains(&format!("{}/", name))) {
+        // Output the directory itself (cargo scans it recursively, which also catches files
+        // being added or removed) and all files in it, since it is specified in rerun_files
+        println!("cargo:rerun-if-changed={}", dir.display());
         if let Ok(entries) = fs::read_dir(dir) {
             for entry in entries.filter_map(|e| e.ok()) {
                 let path = entry.path();
@@ -37,7 +48,17 @@ fn output_reruns(dir: &Path, rerun_files: &HashSet<String>) {
         if let Ok(entries) = fs::read_dir(dir) {
             for entry in entries.filter_map(|e| e.ok()) {
                 let path = entry.path();
-                if path.is_dir() {
+                // `file_type()` comes from the directory listing itself on most
+                // platforms, unlike `path.is_dir()` which costs a stat per entry
+                let is_dir = entry.file_type().map(|t| t.is_dir()).unwrap_or(false);
+                if is_dir {
+                    if entry
+                        .file_name()
+                        .to_str()
+                        .is_some_and(|name| SKIPPED_DIRS.contains(&name))
+                    {
+                        continue;
+                    }
                     // If the entry is a directory, recursively walk it
                     output_reruns(&path, rerun_files);
                 } else if let Some(filename) = path.file_name().and_then(|n| n.to_str()) {
@@ -52,46 +73,145 @@ fn output_reruns(dir: &Path, rerun_files: &HashSet<String>) {
     }
 }
 
+/// Hash of everything that goes into building a package (its sources, the
+/// workspace lockfile, and the enabled features), used as its build cache key.
+/// Anything the build itself writes into the package directory must be left
+/// out, or the key computed before a build would never match the next run's
+fn package_cache_key(entry_path: &Path, lockfile: &Path, features: &str) -> anyhow::Result<String> {
+    let mut hasher = Sha256::new();
+    hasher.update(features.as_bytes());
+    hasher.update([0]);
+    if let Ok(lock) = fs::read(lockfile) {
+        hasher.update(&lock);
+    }
+
+    let walker = walkdir::WalkDir::new(entry_path)
+        .sort_by_file_name()
+        .into_iter()
+        .filter_entry(|e| {
+            !(e.file_type().is_dir()
+                && e.file_name()
+                    .to_str()
+                    .is_some_and(|name| CACHE_SKIPPED_DIRS.contains(&name)))
+        });
+    for sub_entry in walker {
+        let sub_entry = sub_entry?;
+        let path = sub_entry.path();
+        // skip build outputs, which `kit` and cargo write back into the package directory
+        if !sub_entry.file_type().is_file()
+            || sub_entry.file_name() == "Cargo.lock"
+            || path
+                .extension()
+                .is_some_and(|ext| ext == "wasm" || ext == "zip")
+        {
+            continue;
+        }
+        let mut file = File::open(path)?;
+        hasher.update(path.strip_prefix(entry_path)?.to_string_lossy().as_bytes());
+        hasher.update([0]);
+        hasher.update(file.metadata()?.len().to_le_bytes());
+        io::copy(&mut file, &mut hasher)?;
+    }
+    Ok(format!("{:x}", hasher.finalize()))
+}
+
+fn write_package_zip(parent_pkg_path: &str, zip_path: &Path) -> anyhow::Result<()> {
+    let options = FileOptions::default()
+        .compression_method(zip::CompressionMethod::Stored)
+        .unix_permissions(0o755);
+    // write straight to the output file rather than buffering the archive in memory
+    let mut zip = zip::ZipWriter::new(File::create(zip_path)?);
+
+    for sub_entry in walkdir::WalkDir::new(parent_pkg_path) {
+        let sub_entry = sub_entry?;
+        let path = sub_entry.path();
+        let name = path.strip_prefix(Path::new(parent_pkg_path))?;
+
+        if path.is_file() {
+            zip.start_file(name.to_string_lossy(), options)?;
+            // stream the file through a fixed buffer instead of reading it whole
+            io::copy(&mut File::open(path)?, &mut zip)?;
+        } else if !name.as_os_str().is_empty() {
+            zip.add_directory(name.to_string_lossy(), options)?;
+        }
+    }
+    zip.finish()?;
+    Ok(())
+}
+
 fn build_and_zip_package(
     entry_path: PathBuf,
     parent_pkg_path: &str,
+    target_dir: &Path,
+    lockfile: &Path,
     features: &str,
-) -> anyhow::Result<(String, String, Vec<u8>)> {
-    let rt = tokio::runtime::Runtime::new().unwrap();
-    rt.block_on(async {
-        kit::build::execute(&entry_path, true, false, true, features, None, None) // TODO
-            .await
-            .map_err(|e| anyhow::anyhow!("{:?}", e))?;
-
-        let mut writer = Cursor::new(Vec::new());
-        let options = FileOptions::default()
-            .compression_method(zip::CompressionMethod::Stored)
-            .unix_permissions(0o755);
-        {
-            let mut zip = zip::ZipWriter::new(&mut writer);
-
-            for sub_entry in walkdir::WalkDir::new(parent_pkg_path) {
-                let sub_entry = sub_entry?;
-                let path = sub_entry.path();
-                let name = path.strip_prefix(Path::new(parent_pkg_path))?;
-
-                if path.is_file() {
-                    zip.start_file(name.to_string_lossy(), options)?;
-                    let mut file = File::open(path)?;
-                    let mut buffer = Vec::new();
-                    file.read_to_end(&mut buffer)?;
-                    zip.write_all(&buffer)?;
-                } else if !name.as_os_str().is_empty() {
-                    zip.add_directory(name.to_string_lossy(), options)?;
-                }
+) -> anyhow::Result<(String, String)> {
+    let package_name = entry_path.file_name().unwrap().to_str().unwrap();
+    let zip_filename = format!("{}.zip", package_name);
+    // `target/pkg-cache` holds one zip per package and feature set: older entries
+    // are evicted below when a new one is stored
+    let cache_dir = target_dir.join("pkg-cache");
+    let cache_prefix = format!(
+        "{}.{}.",
+        package_name,
+        if features.is_empty() {
+            "default"
+        } else {
+            features
+        }
+    );
+    let cache_key = package_cache_key(&entry_path, lockfile, features)?;
+    let cached_zip_name = format!("{}{}.zip", cache_prefix, cache_key);
+    let cached_zip_path = cache_dir.join(&cached_zip_name);
+
+    if !cached_zip_path.exists() {
+        let rt = tokio::runtime::Runtime::new().unwrap();
+        rt.block_on(async {
+            kit::build::execute(&entry_path, true, false, true, features, None, None) // TODO
+                .await
+                .map_err(|e| anyhow::anyhow!("{:?}", e))
+        })?;
+
+        fs::create_dir_all(&cache_dir)?;
+        // write to a temporary path so an interrupted build never leaves a partial cache entry;
+        // the pid keeps concurrent build-script runs sharing `target/` from clobbering each other
+        let own_tmp_suffix = format!(".{}.tmp", std::process::id());
+        let tmp_zip_path = cache_dir.join(format!("{}{}", cached_zip_name, own_tmp_suffix));
+        let written = write_package_zip(parent_pkg_path, &tmp_zip_path)
+            .and_then(|()| Ok(fs::rename(&tmp_zip_path, &cached_zip_path)?));
+        if let Err(e) = written {
+            let _ = fs::remove_file(&tmp_zip_path);
+            return Err(e);
+        }
+
+        for cache_entry in fs::read_dir(&cache_dir)?.filter_map(|e| e.ok()) {
+            let name = cache_entry.file_name();
+            let Some(name) = name.to_str() else {
+                continue;
+            };
+            if !name.starts_with(&cache_prefix) {
+                continue;
+            }
+            // older zips for this package, and temp files left by killed earlier runs
+            let stale_zip = name.ends_with(".zip") && name != cached_zip_name;
+            let stale_tmp = name.ends_with(".tmp") && !name.ends_with(&own_tmp_suffix);
+            if stale_zip || stale_tmp {
+                let _ = fs::remove_file(cache_entry.path());
             }
-            zip.finish()?;
         }
+    }
+
+    // unlink rather than overwrite: the existing file may be a hard link into the cache
+    let zip_path = target_dir.join(&zip_filename);
+    match fs::remove_file(&zip_path) {
+        Err(e) if e.kind() != io::ErrorKind::NotFound => return Err(e.into()),
+        _ => {}
+    }
+    if fs::hard_link(&cached_zip_path, &zip_path).is_err() {
+        fs::copy(&cached_zip_path, &zip_path)?;
+    }
 
-        let zip_contents = writer.into_inner();
-        let zip_filename = format!("{}.zip", entry_path.file_name().unwrap().to_str().unwrap());
-        Ok((entry_path.display().to_string(), zip_filename, zip_contents))
-    })
+    Ok((entry_path.display().to_string(), zip_filename))
 }
 
 fn main() -> anyhow::Result<()> {
@@ -104,20 +224,32 @@ fn main() -> anyhow::Result<()> {
     let parent_dir = pwd.parent().unwrap();
     let packages_dir = pwd.join("packages");
 
-    let entries: Vec<_> = fs::read_dir(packages_dir)?
+    let entries: Vec<_> = fs::read_dir(&packages_dir)?
         .map(|entry| entry.unwrap().path())
         .collect();
 
-    let rerun_files: HashSet<String> = HashSet::from([
-        "Cargo.lock".to_string(),
-        "Cargo.toml".to_string(),
-        "src/".to_string(),
-    ]);
+    let rerun_files: HashSet<String> =
+        HashSet::from(["Cargo.lock".to_string(), "Cargo.toml".to_string()]);
     output_reruns(&parent_dir, &rerun_files);
+    // Package sources are watched separately: `kinode/src` itself must not be,
+    // since this script writes `src/bootstrapped_processes.rs` on every run
+    output_reruns(&packages_dir, &HashSet::from(["src/".to_string()]));
+    // Non-Rust package inputs; not all of `pkg/`, which kit writes `.wasm`s into
+    for entry_path in &entries {
+        for input in ["api", "pkg/manifest.json", "pkg/scripts.json", "pkg/ui"] {
+            let path = entry_path.join(input);
+            // a watched path that doesn't exist would rerun the build script every time
+            if path.exists() {
+                println!("cargo:rerun-if-changed={}", path.display());
+            }
+        }
+    }
 
     let features = get_features();
+    let target_dir = parent_dir.join("target");
+    let lockfile = parent_dir.join("Cargo.lock");
 
-    let results: Vec<anyhow::Result<(String, String, Vec<u8>)>> = entries
+    let results: Vec<anyhow::Result<(String, String)>> = entries
         .par_iter()
         .filter_map(|entry_path| {
             let parent_pkg_path = entry_path.join("pkg");
@@ -128,6 +260,8 @@ fn main() -> anyhow::Result<()> {
             Some(build_and_zip_package(
                 entry_path.clone(),
                 parent_pkg_path.to_str().unwrap(),
+                &target_dir,
+                &lockfile,
                 &features,
             ))
         })
@@ -143,11 +277,10 @@ fn main() -> anyhow::Result<()> {
 
     for result in results {
         match result {
-            Ok((entry_path, zip_filename, zip_contents)) => {
-                // Further processing, like saving ZIP files and updating bootstrapped_processes
+            Ok((entry_path, zip_filename)) => {
+                // Further processing, like updating bootstrapped_processes
                 let metadata_path = format!("{}/metadata.json", entry_path);
                 let zip_path = format!("{}/target/{}", parent_dir.display(), zip_filename);
-                fs::write(&zip_path, &zip_contents)?;
 
                 writeln!(
                     bootstrapped_processes,
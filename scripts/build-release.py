@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 
+import argparse
 import os
 import shutil
 import subprocess
+import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 def get_system_info():
     # Get OS and architecture information
-    os_info = subprocess.run(["uname"], capture_output=True, text=True, check=True).stdout.strip().lower()
-    arch_info = subprocess.run(["uname", "-m"], capture_output=True, text=True, check=True).stdout.strip().lower()
+    uname = os.uname()
+    os_info = uname.sysname.lower()
+    arch_info = uname.machine.lower()
 
     if os_info == "linux":
         os_info = "unknown-linux-gnu"
@@ -20,16 +24,27 @@ def get_system_info():
 
     return arch_info, os_info
 
-def build_and_move(feature, tmp_dir, architecture, os_name):
+def build_and_move(feature, tmp_dir, stage_root, architecture, os_name, incremental=False):
     print("\n" + "=" * 50)
     print(f"BUILDING {feature if feature else 'default'}")
     print("=" * 50 + "\n")
 
     zip_prefix = f"kinode-{architecture}-{os_name}"
     release_env = os.environ.copy()
-    release_env["CARGO_PROFILE_RELEASE_LTO"] = f"fat"
-    release_env["CARGO_PROFILE_RELEASE_CODEGEN_UNITS"] = f"1"
+    if incremental:
+        # Faster local rebuilds; fat LTO and a single codegen unit defeat incremental reuse
+        release_env["CARGO_PROFILE_RELEASE_LTO"] = f"off"
+        release_env["CARGO_PROFILE_RELEASE_CODEGEN_UNITS"] = f"16"
+        release_env["CARGO_PROFILE_RELEASE_INCREMENTAL"] = f"true"
+    else:
+        release_env["CARGO_PROFILE_RELEASE_LTO"] = f"fat"
+        release_env["CARGO_PROFILE_RELEASE_CODEGEN_UNITS"] = f"1"
     release_env["CARGO_PROFILE_RELEASE_STRIP"] = f"symbols"
+    # Reuse compiled crates across features and runs if sccache is available;
+    # CI should persist SCCACHE_DIR between jobs to benefit
+    if "RUSTC_WRAPPER" not in release_env and shutil.which("sccache"):
+        release_env["RUSTC_WRAPPER"] = "sccache"
+        release_env.setdefault("SCCACHE_DIR", os.path.expanduser("~/.cache/sccache-kinode"))
     if feature:
         subprocess.run(["cargo", "+nightly", "build", "--release", "-p", "kinode", "--features", feature], check=True, env=release_env)
         zip_name = f"{zip_prefix}-{feature}.zip"
@@ -37,21 +52,37 @@ def build_and_move(feature, tmp_dir, architecture, os_name):
         subprocess.run(["cargo", "+nightly", "build", "--release", "-p", "kinode"], check=True, env=release_env)
         zip_name = f"{zip_prefix}.zip"
 
-    # Move and rename the binary
+    # Move and rename the binary; stage it per-feature so the next build
+    # can overwrite `target/release` while this one is still being archived.
+    # `stage_root` is under `target/`, keeping the move a same-filesystem rename
+    # rather than a full copy when `tmp_dir` is on another mount (e.g. tmpfs)
     binary_name = "kinode"
     source_path = f"target/release/{binary_name}"
-    dest_path = os.path.join(tmp_dir, binary_name)
+    stage_dir = os.path.join(stage_root, feature if feature else "default")
+    os.makedirs(stage_dir)
+    dest_path = os.path.join(stage_dir, binary_name)
     shutil.move(source_path, dest_path)
 
-    # Create a zip archive of the binary
     zip_path = os.path.join(tmp_dir, zip_name)
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        zipf.write(dest_path, os.path.basename(dest_path))
+    return dest_path, zip_path
 
-    # Remove the original binary
-    os.remove(dest_path)
+def archive_binary(binary_path, zip_path, compresslevel=None):
+    # Create a zip archive of the binary
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
+        zipf.write(binary_path, os.path.basename(binary_path))
+
+    # Remove the original binary and its staging directory
+    shutil.rmtree(os.path.dirname(binary_path))
 
 def main():
+    parser = argparse.ArgumentParser(description="Build and zip kinode release binaries.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip fat LTO, use more codegen units and fastest zip compression for faster local rebuilds (not for distribution)",
+    )
+    args = parser.parse_args()
+
     # Get system info
     architecture, os_name = get_system_info()
 
@@ -64,9 +95,27 @@ def main():
     # Features to compile with; add more features as needed
     features = ["", "simulation-mode"]
 
-    # Loop through the features and build
-    for feature in features:
-        build_and_move(feature, tmp_dir, architecture, os_name)
+    # Loop through the features and build; the cargo builds share `target/`
+    # (including the package zips written by `kinode/build.rs`) so they run
+    # one at a time, but archiving each binary overlaps with the next build
+    # cargo has not created `target/` yet on a fresh checkout
+    os.makedirs("target", exist_ok=True)
+    stage_root = tempfile.mkdtemp(prefix="release-stage-", dir="target")
+    try:
+        with ThreadPoolExecutor() as executor:
+            archives = [
+                executor.submit(
+                    archive_binary,
+                    *build_and_move(feature, tmp_dir, stage_root, architecture, os_name, args.incremental),
+                    # Distributed zips keep the default level; local builds favor speed over size
+                    1 if args.incremental else None,
+                )
+                for feature in features
+            ]
+            for archive in archives:
+                archive.result()
+    finally:
+        shutil.rmtree(stage_root, ignore_errors=True)
 
     linked_dir = f"\033]8;;file://{tmp_dir}\033\\{tmp_dir}\033]8;;\033\\"
     print(f"Build and move process completed.\nFind release in {linked_dir}.")